@@ -1,18 +1,26 @@
 import dotenv
+import functools
 import os
 import uuid
 import logging
+import orjson
 from entity_secret import generate_entity_secret
 from circle.web3 import developer_controlled_wallets
 from circle.web3 import utils
 import requests
-
-# Set up logging
-logging.basicConfig(level=logging.DEBUG)
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 # Load environment variables
 dotenv.load_dotenv()
 
+logger = logging.getLogger(__name__)
+
+# Shared HTTP session so calls to api.circle.com reuse pooled keep-alive connections
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(pool_connections=20, pool_maxsize=100,
+                                      max_retries=Retry(total=3, backoff_factor=0.1)))
+
 def create_transfer(from_wallet_id: str, amount: str, destination_address: str) -> None:
 
     entitySecretCipherText = generate_entity_secret()
@@ -41,7 +49,7 @@ def create_transfer(from_wallet_id: str, amount: str, destination_address: str)
 
     url = "https://api.circle.com/v1/w3s/developer/transactions/transfer"
 
-    response = requests.post(url, json=payload, headers=headers)
+    response = SESSION.post(url, json=payload, headers=headers)
 
     # print(response.text)
 
@@ -56,25 +64,30 @@ def wallet_balance(wallet_id: str) -> str:
         "Authorization": f"Bearer {api_key}",  # Using the API key for authentication
         "Content-Type": "application/json"  # Ensuring the payload is sent as JSON
     }
-    response = requests.request("GET", url, headers=headers)
+    response = SESSION.get(url, headers=headers)
 
-    # Parse the response to get the amount
+    # Parse the response to get the amount of the first token balance
     try:
-        data = response.json()
-        token_balances = data.get("data", {}).get("tokenBalances", [])
-
-        if token_balances:
-            # Assuming we want to extract the first token balance
-            token_balance = token_balances[0]
-            token_amount = token_balance.get("amount", "0")  # Default to 0 if amount is missing
-            print(f"Token amount: {token_amount}")
-            return token_amount
-        else:
-            print("No token balances found.")
-            return "0"
-    except Exception as e:
-        print(f"Error parsing wallet balance: {e}")
+        token_amount = orjson.loads(response.content)["data"]["tokenBalances"][0]["amount"]
+    except (KeyError, IndexError, TypeError):
+        logger.info("No token balances found.")
         return "0"
+    logger.info("Token amount: %s", token_amount)
+    return token_amount
+
+
+@functools.lru_cache(maxsize=1)
+def _wallets_client():
+    # Initialize developer-controlled wallets client once per process
+    return utils.init_developer_controlled_wallets_client(
+        api_key=os.getenv('CIRCLE_API_KEY'),
+        entity_secret=os.getenv("CIRCLE_HEX_ENCODED_ENTITY_SECRET_KEY")
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _wallet_sets_api():
+    return developer_controlled_wallets.WalletSetsApi(_wallets_client())
 
 
 def create_wallet(email, name, ref_id):
@@ -92,19 +105,12 @@ def create_wallet(email, name, ref_id):
     # Get API key from environment
     api_key = os.getenv('CIRCLE_API_KEY')
     if not api_key:
-        print("Error: CIRCLE_API_KEY is not set in the environment!")
+        logger.error("CIRCLE_API_KEY is not set in the environment!")
         return
     # print(f"Using API key: {api_key}")
 
-    # Initialize developer-controlled wallets client
-    # print("Initializing developer-controlled wallets client...")
-    client = utils.init_developer_controlled_wallets_client(
-        api_key=api_key,
-        entity_secret=os.getenv("CIRCLE_HEX_ENCODED_ENTITY_SECRET_KEY")
-    )
-
-    # Create an instance of the WalletSets API
-    wallet_sets_api = developer_controlled_wallets.WalletSetsApi(client)
+    # Reuse the developer-controlled wallets client and WalletSets API
+    wallet_sets_api = _wallet_sets_api()
 
     try:
         # Create wallet set request
@@ -123,39 +129,37 @@ def create_wallet(email, name, ref_id):
 
         url = "https://api.circle.com/v1/w3s/developer/wallets"
 
-        walletSetId = wallet_set_id
-
-        payload = f"""{{
+        payload = {
             "blockchains": [
                 "ETH-SEPOLIA"
             ],
             "metadata": [
-                {{
-                    "name": "{name}",
-                    "refId": "{ref_id}"
-                }}
+                {
+                    "name": name,
+                    "refId": ref_id
+                }
             ],
             "count": 1,
-            "entitySecretCiphertext": "{entitySecretCipherText}",
-            "idempotencyKey": "{idempotencyKey}",
-            "walletSetId": "{walletSetId}"
-        }}"""
+            "entitySecretCiphertext": entitySecretCipherText,
+            "idempotencyKey": str(idempotencyKey),
+            "walletSetId": wallet_set_id
+        }
         headers = {
-            "Authorization": f"Bearer {api_key}",  # Using the API key for authentication
-            "Content-Type": "application/json"  # Ensuring the payload is sent as JSON
+            "Authorization": f"Bearer {api_key}"  # Using the API key for authentication
         }
 
-        response = requests.request("POST", url, headers=headers, data=payload)
+        response = SESSION.post(url, json=payload, headers=headers)
         # print(response.text)
         return response.json().get('data', {}).get('wallets', [])[0].get('id'), response.json().get('data', {}).get('wallets', [])[0].get('address')
 
 
     except Exception as e:
-        print(f"Error creating wallet set")
+        logger.exception("Error creating wallet set")
 
 
 # Trigger wallet creation
 # wallet_id, wallet_address = create_wallet("user@example.com", "23423", "3424")
 # print(wallet_id, wallet_address)
 # f89bfdb1-ccf3-517a-8046-12cffeb406de
-print(wallet_balance("f89bfdb1-ccf3-517a-8046-12cffeb406de"))
\ No newline at end of file
+if __name__ == "__main__":
+    print(wallet_balance("f89bfdb1-ccf3-517a-8046-12cffeb406de"))
@@ -2,13 +2,18 @@ import dotenv
 import os
 dotenv.load_dotenv()
 
-import base64
+import pybase64 as base64
 import codecs
-from Crypto.PublicKey import RSA
-from Crypto.Cipher import PKCS1_OAEP
-from Crypto.Hash import SHA256
+import functools
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import padding
 
-def generate_entity_secret():
+# RSA-OAEP with SHA-256 for both the digest and MGF1, as Circle expects
+OAEP_PADDING = padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()), algorithm=hashes.SHA256(), label=None)
+
+@functools.lru_cache(maxsize=1)
+def _load_public_key_and_secret():
+    # Parse the key and decode the secret once; every call after that only encrypts
 
     public_key_string = os.getenv('CIRCLE_PUBLIC_KEY')
     hex_encoded_entity_secret = os.getenv('CIRCLE_HEX_ENCODED_ENTITY_SECRET_KEY')
@@ -18,11 +23,16 @@ def generate_entity_secret():
     if len(entity_secret) != 32:
         raise ValueError("Invalid entity secret length. Expected 32 bytes.")
 
-    public_key = RSA.import_key(public_key_string)
+    public_key = serialization.load_pem_public_key(public_key_string.encode())
+
+    return public_key, entity_secret
+
+def generate_entity_secret():
+
+    public_key, entity_secret = _load_public_key_and_secret()
 
     # Encrypt data using the public key
-    cipher_rsa = PKCS1_OAEP.new(key=public_key, hashAlgo=SHA256)
-    encrypted_data = cipher_rsa.encrypt(entity_secret)
+    encrypted_data = public_key.encrypt(entity_secret, OAEP_PADDING)
 
     # Encode to base64
     encrypted_data_base64 = base64.b64encode(encrypted_data)
@@ -1,29 +1,62 @@
+import anyio
+import asyncio
 import hashlib
-from fastapi import UploadFile, File, Form, HTTPException, Depends
-from pdfminer.high_level import extract_text
+import io
+import logging
+import logging.handlers
+import multiprocessing
+import queue
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from fastapi import UploadFile, File, Form, HTTPException, Depends, BackgroundTasks
+from pdfminer.high_level import extract_text_to_fp
 import openai
 import uvicorn
-import json
+import orjson
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
+from fastapi.concurrency import run_in_threadpool
 import os
-from pydantic import BaseModel, EmailStr
-import requests
-from sqlalchemy import Column, Integer, String, Boolean, create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker, Session
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
+import httpx
+from cachetools import TTLCache
+from sqlalchemy import bindparam, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from passlib.context import CryptContext
 import circle_veretha
+from models import SessionLocal, User, engine, init_db
+from pdf_pages import count_pdf_pages, extract_pdf_pages, warm_up
+from semantic_cache import EMBEDDING_MODEL, SemanticCache
 
 # Load environment variables from .env file
 load_dotenv()
 
+# Log records are queued by the request path and written by a listener thread, so stdout I/O
+# and formatting never run on the event loop. Request and response bodies are logged at DEBUG,
+# so at the default INFO level they are never formatted.
+log_queue = queue.Queue(-1)
+log_listener = logging.handlers.QueueListener(log_queue, logging.StreamHandler(), respect_handler_level=True)
+logging.basicConfig(level=logging.INFO, handlers=[logging.handlers.QueueHandler(log_queue)])
+logger = logging.getLogger(__name__)
+
 PROXYCURL_API_KEY = os.getenv('PROXYCURL_API_KEY')
 OPENAI_API_KEY = os.getenv('OPENAI_API_KEY')
 openai.api_key = OPENAI_API_KEY
 
+# Upstream endpoints and headers, resolved once instead of on every request
+PROXYCURL_URL = 'https://nubela.co/proxycurl/api/v2/linkedin'
+PROXYCURL_HEADERS = {'Authorization': f'Bearer {PROXYCURL_API_KEY}'}
+WLD_VERIFY_URL = f"{os.getenv('NEXT_PUBLIC_WLD_API_BASE_URL')}/api/v1/verify/{os.getenv('NEXT_PUBLIC_WLD_APP_ID')}"
+
+# Checked on startup, so a missing key fails the boot rather than individual requests
+REQUIRED_ENV_VARS = ('PROXYCURL_API_KEY', 'OPENAI_API_KEY', 'NEXT_PUBLIC_WLD_API_BASE_URL', 'NEXT_PUBLIC_WLD_APP_ID')
+
 # FastAPI app instance
-app = FastAPI()
+app = FastAPI(default_response_class=ORJSONResponse)
 
 # CORS middleware
 app.add_middleware(
@@ -34,48 +67,90 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Database setup
-Base = declarative_base()
-DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# User table for registration
-class User(Base):
-    __tablename__ = 'users'
-    id = Column(Integer, primary_key=True, index=True)
-    email = Column(String, unique=True, index=True)
-    password = Column(String)
-    full_name = Column(String)
-    occupation = Column(String)
-    company = Column(String)
-    skills = Column(String)
-    country = Column(String)
-    city = Column(String)
-    linkedin_url = Column(String)
-    verified = Column(Boolean, default=False)  # Changed to Boolean
-    wallet_id = Column(String)
-    wallet_address = Column(String)
-
-# Create the tables in the database
-Base.metadata.create_all(bind=engine)
-
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Compress JSON bodies over 1 KB (profile lists, score results); smaller ones aren't worth it
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
+@app.on_event("startup")
+async def startup():
+    missing = [name for name in REQUIRED_ENV_VARS if not os.getenv(name)]
+    if missing:
+        raise RuntimeError(f"Missing required environment variables: {', '.join(missing)}")
+
+    log_listener.start()
+    logger.info("Event loop: %s", type(asyncio.get_running_loop()).__name__)
+    await init_db()
+    # More threadpool slots for password hashing, PDF parsing and the sync Circle routes
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 64
+    # Shared async clients, so upstream calls don't block the event loop. The OpenAI client is
+    # built after the env check, since it raises on a missing key.
+    app.state.openai = openai.AsyncOpenAI(api_key=OPENAI_API_KEY)
+    app.state.http = httpx.AsyncClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        timeout=httpx.Timeout(10.0),
+    )
+    # The pool only spawns processes on submit, so submit one no-op per worker now; otherwise the
+    # first long upload would wait for the forkserver and the workers to start
+    app.state.pdf_pool = new_pdf_pool()
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(*(loop.run_in_executor(app.state.pdf_pool, warm_up)
+                           for _ in range(PDF_PROCESS_WORKERS)))
+
+@app.on_event("shutdown")
+async def shutdown():
+    await app.state.http.aclose()
+    await app.state.openai.close()
+    app.state.pdf_pool.shutdown()
+    log_listener.stop()
+
+# Password hashing context: new hashes use argon2id, existing bcrypt hashes still verify
+# and are upgraded on the next successful login. Parameters follow OWASP's argon2id profile
+# (46 MiB, t=1, p=1); hashes made with other parameters are re-hashed on login as well.
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__type="ID",
+    argon2__time_cost=1,
+    argon2__memory_cost=46 * 1024,
+    argon2__parallelism=1,
+)
+
+# User lookups by email, built once at import time so SQLAlchemy reuses the compiled SQL
+SELECT_USER_BY_EMAIL = select(User).where(User.email == bindparam("email"))
+SELECT_CREDENTIALS_BY_EMAIL = select(User.id, User.password).where(User.email == bindparam("email"))
+
+# Profile reads select just the returned columns as plain rows, skipping the password column and
+# ORM object construction
+PROFILE_COLUMNS = (User.id, User.email, User.full_name, User.occupation, User.company, User.skills,
+                   User.country, User.city, User.linkedin_url, User.verified, User.wallet_id,
+                   User.wallet_address)
+SELECT_PROFILE_BY_EMAIL = select(*PROFILE_COLUMNS).where(User.email == bindparam("email"))
 
 # Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
+async def get_db():
+    async with SessionLocal() as db:
         yield db
-    finally:
-        db.close()
 
 def generate_wallet_id_and_address(email: str):
     """Generate wallet_id and wallet_address using the email as a base."""
     wallet_id, wallet_address = circle_veretha.create_wallet(email, email, email)
     return wallet_id, wallet_address
 
+async def create_wallet_and_persist(user_id: int, email: str):
+    """Create the user's wallet after registration and store it on their row."""
+    try:
+        wallet_id, wallet_address = await run_in_threadpool(generate_wallet_id_and_address, email)
+    except Exception as e:
+        logger.error("Failed to create wallet for user %s: %s", user_id, e)
+        return
+
+    async with SessionLocal() as db:
+        await db.execute(update(User).where(User.id == user_id)
+                         .values(wallet_id=wallet_id, wallet_address=wallet_address))
+        await db.commit()
+    profile_cache.pop(email, None)
+    logger.info("Wallet created for user %s: %s, %s", user_id, wallet_address, wallet_id)
+
 # Pydantic model for user registration
 class UserCreate(BaseModel):
     email: EmailStr
@@ -89,52 +164,60 @@ class UserCreate(BaseModel):
     linkedin_url: str = ""
     verified: bool = False  # Changed to boolean
 
+# Pydantic model for the user profile returned by /register, /get-profile and /login
+class UserResponse(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    email: str
+    full_name: str
+    occupation: str
+    company: str
+    skills: str
+    country: str
+    city: str
+    linkedin_url: str
+    verified: bool
+    wallet_id: str | None = None  # Empty until the background wallet creation finishes
+    wallet_address: str | None = None
+
 # Register a new user
-@app.post("/register")
-def register_user(user: UserCreate, db: Session = Depends(get_db)):
-    # Check if the user is already registered
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if db_user:
+@app.post("/register", response_model=UserResponse)
+async def register_user(user: UserCreate, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_db)):
+    # Hash the password in the threadpool, off the event loop
+    hashed_password = await run_in_threadpool(pwd_context.hash, user.password)
+
+    # Create new user entry. ON CONFLICT DO NOTHING on the unique email index skips duplicates in
+    # the same statement, so there is no separate existence check and no race between the two.
+    insert_user = (
+        sqlite_insert(User)
+        .values(
+            email=user.email,
+            password=hashed_password,
+            full_name=user.full_name,
+            occupation=user.occupation,
+            company=user.company,
+            skills=user.skills,
+            country=user.country,
+            city=user.city,
+            linkedin_url=user.linkedin_url,
+            verified=user.verified,  # Accept boolean
+            wallet_id=None,  # Filled in by create_wallet_and_persist; clients poll /get-profile
+            wallet_address=None
+        )
+        .on_conflict_do_nothing(index_elements=[User.email])
+        .returning(User)
+    )
+    new_user = (await db.execute(insert_user)).scalar_one_or_none()
+    if new_user is None:
         raise HTTPException(status_code=400, detail="Email already registered")
+    await db.commit()
 
-    # Hash the password
-    hashed_password = pwd_context.hash(user.password)
-
-    wallet_id, wallet_address = generate_wallet_id_and_address(user.email)
-
-    # Create new user entry
-    new_user = User(
-        email=user.email,
-        password=hashed_password,
-        full_name=user.full_name,
-        occupation=user.occupation,
-        company=user.company,
-        skills=user.skills,
-        country=user.country,
-        city=user.city,
-        linkedin_url=user.linkedin_url,
-        verified=user.verified,  # Accept boolean
-        wallet_id=wallet_id,
-        wallet_address=wallet_address
-    )
-    db.add(new_user)
-    db.commit()
+    # Create the wallet after the response is sent rather than waiting on Circle here
+    background_tasks.add_task(create_wallet_and_persist, new_user.id, new_user.email)
 
-    print(f"New user registered: {new_user.wallet_address}, {new_user.wallet_id}")
-    return {
-        "id": new_user.id,
-        "email": new_user.email,
-        "full_name": new_user.full_name,
-        "occupation": new_user.occupation,
-        "company": new_user.company,
-        "skills": new_user.skills,
-        "country": new_user.country,
-        "city": new_user.city,
-        "linkedin_url": new_user.linkedin_url,
-        "verified": new_user.verified,  # Return boolean
-        "wallet_id": new_user.wallet_id,
-        "wallet_address": new_user.wallet_address
-    }
+    logger.info("New user registered: %s, %s", new_user.id, new_user.email)
+    return new_user
 
 @app.get("/get-balance/{wallet_id}")
 def get_balance(wallet_id: str):
@@ -145,22 +228,24 @@ def pay():
     circle_veretha.create_transfer("f89bfdb1-ccf3-517a-8046-12cffeb406de", "10",
                                    "0x87568c541a2d09416ff92f05bd9ca3ffbf2c020e")
 
-def fetch_linkedin_profile(linkedin_url):
-    api_endpoint = 'https://nubela.co/proxycurl/api/v2/linkedin'
-    headers = {'Authorization': 'Bearer ' + PROXYCURL_API_KEY}
+# Fetched LinkedIn profiles keyed by URL, so a repeat lookup within a day skips the paid
+# Proxycurl call entirely
+linkedin_cache = TTLCache(maxsize=4096, ttl=86400)
+
+async def fetch_linkedin_profile(linkedin_url):
     params = {
         'linkedin_profile_url': linkedin_url,
         'use_cache': 'if-present',  # Use cache to reduce API cost
         'fallback_to_cache': 'on-error',  # Fallback to cache if there's an error
     }
 
-    response = requests.get(api_endpoint, params=params, headers=headers)
+    response = await app.state.http.get(PROXYCURL_URL, params=params, headers=PROXYCURL_HEADERS)
 
     if response.status_code == 200:
-        print(f"LinkedIn profile fetched successfully for URL: {linkedin_url}")
+        logger.info("LinkedIn profile fetched successfully for URL: %s", linkedin_url)
         return response.json()
     else:
-        print(f"Failed to fetch LinkedIn profile: {response.status_code} - {response.text}")
+        logger.warning("Failed to fetch LinkedIn profile: %s - %s", response.status_code, response.text)
         return {}
 
 class LinkedInRequest(BaseModel):
@@ -168,102 +253,245 @@ class LinkedInRequest(BaseModel):
 @app.post("/extract-linkedin")
 async def extract_linkedin(linkedin_request: LinkedInRequest):
     linkedin_url = linkedin_request.linkedin_url
-    print(f"Received LinkedIn URL: {linkedin_url}")
-    profile_data = fetch_linkedin_profile(linkedin_url)
-    print(f"Profile data: {profile_data}")
+    logger.info("Received LinkedIn URL: %s", linkedin_url)
+    profile_data = linkedin_cache.get(linkedin_url)
+    if profile_data is None:
+        profile_data = await fetch_linkedin_profile(linkedin_url)
+        if profile_data:
+            linkedin_cache[linkedin_url] = profile_data
+    logger.debug("Profile data: %s", profile_data)
 
     return {"linkedin_data": profile_data}
 
 
-def generate_prompt_messages(resume_text, job_description):
-    prompt = f"""
-                   You are a career consultant helping candidates assess how well their resume matches
-                    a specific job vacancy. 
-                   You will be provided with the candidate's resume and the job description. 
-                   Your task is to provide an objective evaluation of how well the resume fits the job requirements, 
-                   give feedback, and offer suggestions on how the resume can be improved for a better match.
-                    
-                    Don't be  critical, give a good feedack.
-                    
-                   Please provide the result in JSON format (only JSON!! without any additional symbols), containing the
-                    following fields:
+# Static scoring instructions, built once at import time and sent ahead of the resume and job
+# description, so every request shares the same message prefix. The prefix is only a few hundred
+# tokens, below the 1024-token minimum for OpenAI's prompt caching, so it is not cached today.
+SCORE_FIELDS = """
                    - "score": a string  (0-100) representing the match between the resume and the job description, where
                     0 - no match at all and 100 means a absolutely perfect match.
                    - "description": a string containing feedback on the score: why that score, and how well the resume
                     fits the job requirements.
                    - "details": a string containing html with suggestions for improving the resume to better match the
-                    job description in form of multiple suggestions. 
+                    job description in form of multiple suggestions.
+               """
 
+SCORING_INSTRUCTIONS = """
+                   You are a career consultant helping candidates assess how well their resume matches
+                    a specific job vacancy.
+                   You will be provided with the candidate's resume and the job description in the next message.
+                   Your task is to provide an objective evaluation of how well the resume fits the job requirements,
+                   give feedback, and offer suggestions on how the resume can be improved for a better match.
 
-                   Candidate's resume: {resume_text}
-                   Job description: {job_description}
+                    Don't be  critical, give a good feedack.
+
+                   Please provide the result in JSON format, containing the
+                    following fields:""" + SCORE_FIELDS
+
+BATCH_SCORING_INSTRUCTIONS = """
+                   You are a career consultant helping candidates assess how well their resume matches
+                    specific job vacancies.
+                   You will be provided with several numbered pairs of a candidate's resume and a job description
+                    in the next message.
+                   For each pair, provide an objective evaluation of how well the resume fits the job requirements,
+                   give feedback, and offer suggestions on how the resume can be improved for a better match.
+
+                    Don't be  critical, give a good feedack.
+
+                   Please provide the result in JSON format, as an object with a single field "results": an array
+                    with one entry per pair, each containing the following fields:
+                   - "pair": the number of the pair the entry is for.""" + SCORE_FIELDS
+
+SYSTEM_MSG = {
+    "role": "system",
+    "content": "You are a career consultant helping candidates improve their resumes. "
+               "Always respond in JSON format."
+}
+SCORING_INSTRUCTIONS_MSG = {"role": "user", "content": SCORING_INSTRUCTIONS}
+BATCH_SCORING_INSTRUCTIONS_MSG = {"role": "user", "content": BATCH_SCORING_INSTRUCTIONS}
+
+
+def format_pair(resume_text, job_description):
+    return f"Candidate's resume: {resume_text}\nJob description: {job_description}"
+
+
+def generate_prompt_messages(resume_text, job_description):
+    return [SYSTEM_MSG, SCORING_INSTRUCTIONS_MSG,
+            {"role": "user", "content": format_pair(resume_text, job_description)}]
 
-                   The output must be in JSON!! without any additional symbols. 
-                   Only the dictionary itself.
-               """
-    messages = [
-        {
-            "role": "system",
-            "content": "You are a career consultant helping candidates improve their resumes. "
-                       "Always respond in JSON format. Output should be JSON only!!"
-                       "NO additional symbols. Only the dictionary itself."
-        },
-        {"role": "user", "content": prompt}
-    ]
-
-    return messages
+
+def generate_batch_prompt_messages(pairs):
+    # One user message for all pairs, so the instructions are sent (and billed) once
+    numbered = "\n\n".join(
+        f"Pair {number}:\n{format_pair(resume_text, job_description)}"
+        for number, (resume_text, job_description) in enumerate(pairs, start=1)
+    )
+    return [SYSTEM_MSG, BATCH_SCORING_INSTRUCTIONS_MSG, {"role": "user", "content": numbered}]
 
 class ScoreRequest(BaseModel):
     resume_text: str
     job_description: str
 
+SCORE_MODEL = "gpt-4o-mini"
+
+# Scored results keyed by sha256 of the model, resume and job description, so resubmitting
+# the same pair within a day skips the OpenAI round trip
+score_cache = TTLCache(maxsize=4096, ttl=86400)
+
+def score_cache_key(resume_text, job_description, model=SCORE_MODEL):
+    return hashlib.sha256(f"{model}\0{resume_text}\0{job_description}".encode()).hexdigest()
+
+# Scored results keyed by the embedding of the resume, grouped by model and job description: a hit
+# needs the exact same job description and a resume with cosine similarity >= 0.95. Entries expire
+# with the exact cache.
+semantic_score_cache = SemanticCache(maxsize=2048, threshold=0.95, ttl=score_cache.ttl)
+
+def semantic_group_key(job_description, model=SCORE_MODEL):
+    return hashlib.sha256(f"{model}\0{job_description}".encode()).hexdigest()
+
+# Upper bound on pairs per /score-resume-batch call, to keep the prompt within the context window
+SCORE_BATCH_MAX = 10
+
+def to_score_result(result):
+    return {
+        "score_result": result.get("score", 0),
+        "description": result.get("description", "No description provided."),
+        "improvements": result.get("details", "No details provided."),
+    }
+
+async def complete_json(messages):
+    # JSON mode: the API guarantees the reply is a parseable JSON object
+    # temperature=0 and a fixed seed keep the scoring deterministic, so caching it is safe
+    response = await app.state.openai.chat.completions.create(model=SCORE_MODEL,
+                                                           messages=messages,
+                                                           response_format={"type": "json_object"},
+                                                           temperature=0,
+                                                           seed=42)
+    content = response.choices[0].message.content
+    logger.debug("Received response from OpenAI: %s", content)
+    return orjson.loads(content)
+
 
 @app.post("/score-resume")
 async def score_resume(request: ScoreRequest):
-    print(f"Received resume text: {request.resume_text}")
-    print(f"Received job description: {request.job_description}")
+    logger.debug("Received resume text: %s", request.resume_text)
+    logger.debug("Received job description: %s", request.job_description)
+    cache_key = score_cache_key(request.resume_text, request.job_description)
+    cached = score_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     messages = generate_prompt_messages(request.resume_text, request.job_description)
 
+    # Second tier: the same job description with a near-identical resume (e.g. one bullet tweaked)
+    # reuses its score
+    group = semantic_group_key(request.job_description)
+    vector = None
+    try:
+        embedding = await app.state.openai.embeddings.create(model=EMBEDDING_MODEL, input=request.resume_text)
+        vector = SemanticCache.normalize(embedding.data[0].embedding)
+    except Exception:
+        # Rate limits or an over-long resume only skip the semantic tier; the chat call can still succeed
+        logger.warning("Embedding failed, scoring without the semantic cache", exc_info=True)
+    else:
+        cached = semantic_score_cache.get(vector, group)
+        if cached is not None:
+            return cached
+
     try:
-        response = openai.chat.completions.create(model="gpt-4o-mini",
-                                                  messages=messages)
-        content = response.choices[0].message.content
-        print(f"Received response from OpenAI: {content}")
-        result = json.loads(content)
-
-        score = result.get("score", 0)
-        description = result.get("description", "No description provided.")
-        details = result.get("details", "No details provided.")
-        print(f"Extracted score: {score}, description: {description}, improvements: {details}")
-        return {"score_result": score, "description": description, "improvements": details}
+        score_result = to_score_result(await complete_json(messages))
+        logger.debug("Extracted score: %s", score_result)
+        score_cache[cache_key] = score_result
+        if vector is not None:
+            semantic_score_cache.add(vector, group, score_result)
+        return score_result
     except Exception as e:
         return {"error": str(e)}
 
 
-@app.get("/get-profile/{email}")
-def get_profile(email: str, db: Session = Depends(get_db)):
+@app.post("/score-resume-batch")
+async def score_resume_batch(score_requests: list[ScoreRequest]):
+    if len(score_requests) > SCORE_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {SCORE_BATCH_MAX} pairs per batch")
+
+    # Serve cached pairs directly and score the rest in a single OpenAI call
+    cache_keys = [score_cache_key(r.resume_text, r.job_description) for r in score_requests]
+    results = [score_cache.get(key) for key in cache_keys]
+    pending = [index for index, result in enumerate(results) if result is None]
+
+    if pending:
+        messages = generate_batch_prompt_messages(
+            (score_requests[index].resume_text, score_requests[index].job_description) for index in pending
+        )
+        try:
+            scored = (await complete_json(messages)).get("results", [])
+        except Exception as e:
+            return {"error": str(e)}
+
+        # Match entries to pairs by the number the model echoes back, never by position, and cache
+        # only a complete answer: exactly one well-formed entry per pair
+        entries = scored if isinstance(scored, list) else []
+        by_pair = {}
+        for entry in entries:
+            if not isinstance(entry, dict):
+                continue
+            try:
+                # The model sometimes echoes the number as a string
+                by_pair[int(entry.get("pair"))] = entry
+            except (TypeError, ValueError):
+                continue
+        cacheable = len(entries) == len(pending) and by_pair.keys() == set(range(1, len(pending) + 1))
+        for number, index in enumerate(pending, start=1):
+            result = by_pair.get(number)
+            if result is not None:
+                results[index] = to_score_result(result)
+                if cacheable:
+                    score_cache[cache_keys[index]] = results[index]
+
+    return {"results": [result or {"error": "No score returned for this pair."} for result in results]}
+
+
+# Recently read profiles keyed by email. Writes in this process evict the entry; other uvicorn
+# workers see the change once the short TTL runs out.
+profile_cache = TTLCache(maxsize=10_000, ttl=60)
+
+@app.get("/get-profile/{email}", response_model=UserResponse)
+async def get_profile(email: str, db: AsyncSession = Depends(get_db)):
+    cached = profile_cache.get(email)
+    if cached is not None:
+        return cached
+
     # Find the user by email
-    db_user = db.query(User).filter(User.email == email).first()
+    row = (await db.execute(SELECT_PROFILE_BY_EMAIL, {"email": email})).first()
 
     # If user is not found, raise an error
-    if not db_user:
+    if not row:
         raise HTTPException(status_code=404, detail="User not found")
 
-    # Return the user's profile details
-    return {
-        "id": db_user.id,
-        "email": db_user.email,
-        "full_name": db_user.full_name,
-        "occupation": db_user.occupation,
-        "company": db_user.company,
-        "skills": db_user.skills,
-        "country": db_user.country,
-        "city": db_user.city,
-        "linkedin_url": db_user.linkedin_url,
-        "verified": db_user.verified,  # Return boolean
-        "wallet_id": db_user.wallet_id,
-        "wallet_address": db_user.wallet_address
-    }
+    # Return the user's profile details. Profiles still waiting for their wallet aren't
+    # cached, so clients polling for it see the wallet as soon as it is stored.
+    profile = UserResponse.model_validate(row)
+    if profile.wallet_id:
+        profile_cache[email] = profile
+    return profile
+
+
+# Batch lookups, so a UI listing many users makes one request and one IN (...) query instead of N.
+# The list is capped to stay well under SQLite's bound-parameter limit.
+class EmailsBody(BaseModel):
+    emails: list[EmailStr] = Field(max_length=200)
+
+@app.post("/verify-list")
+async def verify_list(body: EmailsBody, db: AsyncSession = Depends(get_db)):
+    # Unknown emails are left out of the result
+    rows = await db.execute(select(User.email, User.verified).where(User.email.in_(body.emails)))
+    return {email: verified for email, verified in rows}
+
+@app.post("/profiles", response_model=dict[str, UserResponse])
+async def get_profiles(body: EmailsBody, db: AsyncSession = Depends(get_db)):
+    # Unknown emails are left out of the result
+    rows = await db.execute(select(*PROFILE_COLUMNS).where(User.email.in_(body.emails)))
+    return {row.email: row for row in rows}
 
 
 class VerifyRequest(BaseModel):
@@ -275,7 +503,7 @@ class VerifyRequest(BaseModel):
 
 @app.post("/verify")
 async def verify(req_body: VerifyRequest):
-    print("Received request to verify credential:\n", req_body)
+    logger.debug("Received request to verify credential:\n%s", req_body)
 
     payload = {
         "nullifier_hash": req_body.nullifier_hash,
@@ -285,23 +513,22 @@ async def verify(req_body: VerifyRequest):
         "action": req_body.action
     }
 
-    print("Sending request to World ID /verify endpoint:\n", payload)
-
-    verify_endpoint = f"{os.getenv('NEXT_PUBLIC_WLD_API_BASE_URL')}/api/v1/verify/{os.getenv('NEXT_PUBLIC_WLD_APP_ID')}"
+    logger.debug("Sending request to World ID /verify endpoint:\n%s", payload)
 
     try:
-        verify_res = requests.post(verify_endpoint, json=payload)
+        verify_res = await app.state.http.post(WLD_VERIFY_URL, json=payload)
         wld_response = verify_res.json()
-        print(f"Received {verify_res.status_code} response from World ID /verify endpoint:\n", wld_response)
+        logger.debug("Received %s response from World ID /verify endpoint:\n%s", verify_res.status_code, wld_response)
 
         if verify_res.status_code == 200:
-            print("Credential verified! This user's nullifier hash is: ", wld_response["nullifier_hash"])
+            logger.info("Credential verified! This user's nullifier hash is: %s", wld_response["nullifier_hash"])
             return {"code": "success", "detail": "This action verified correctly!"}
         else:
             raise HTTPException(status_code=verify_res.status_code, detail=wld_response["detail"])
 
-    except requests.exceptions.RequestException as e:
-        print(f"Error occurred: {e}")
+    except (httpx.HTTPError, ValueError) as e:
+        # ValueError covers a non-JSON reply, e.g. an HTML error page from a proxy
+        logger.error("Error occurred: %s", e)
         raise HTTPException(status_code=500, detail="Error communicating with World ID verification service.")
 
 
@@ -310,11 +537,11 @@ class EmailModel(BaseModel):
     email: EmailStr
 
 @app.post("/set-verified")
-def set_verified(email_model: EmailModel, db: Session = Depends(get_db)):
+async def set_verified(email_model: EmailModel, db: AsyncSession = Depends(get_db)):
     # Find the user by email
     email = email_model.email
-    print(f"Setting verification status for user {email} to True")
-    db_user = db.query(User).filter(User.email == email).first()
+    logger.info("Setting verification status for user %s to True", email)
+    db_user = (await db.execute(SELECT_USER_BY_EMAIL, {"email": email})).scalar_one_or_none()
 
     # If user is not found, raise an error
     if not db_user:
@@ -322,8 +549,9 @@ def set_verified(email_model: EmailModel, db: Session = Depends(get_db)):
 
     # Update the user's verification status to True
     db_user.verified = True  # Always set to True
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
+    profile_cache.pop(email, None)
 
     return {"message": f"User {db_user.email} verification status updated to {db_user.verified}"}
 
@@ -333,40 +561,123 @@ class UserAuth(BaseModel):
     email: EmailStr
     password: str
 
-@app.post("/login")
-def login_user(user: UserAuth, db: Session = Depends(get_db)):
-    # Find the user by email
-    db_user = db.query(User).filter(User.email == user.email).first()
+# Recent password verification results, keyed by a 16-byte BLAKE2b digest of email, password and
+# stored hash. The stored hash is part of the key, so a password change never hits a stale entry.
+login_cache = TTLCache(maxsize=10_000, ttl=300)
+
+def login_cache_key(email, password, stored_hash):
+    return hashlib.blake2b(f"{email}:{password}:{stored_hash}".encode(), digest_size=16).digest()
+
+async def verify_password(email, password, stored_hash):
+    """Return (verified, new_hash); new_hash is set when a legacy hash should be replaced."""
+    # Hashing is CPU-bound, so run it in the threadpool and skip it for recently verified logins
+    key = login_cache_key(email, password, stored_hash)
+    verified = login_cache.get(key)
+    if verified is not None:
+        return verified, None
+
+    verified, new_hash = await run_in_threadpool(pwd_context.verify_and_update, password, stored_hash)
+    login_cache[key] = verified
+    return verified, new_hash
+
+@app.post("/login", response_model=UserResponse)
+async def login_user(user: UserAuth, db: AsyncSession = Depends(get_db)):
+    # Fetch only the columns needed for the credential check
+    row = (await db.execute(SELECT_CREDENTIALS_BY_EMAIL, {"email": user.email})).first()
+    if not row:
+        raise HTTPException(status_code=400, detail="Invalid credentials")
 
-    # Check if user exists and password is valid
-    if not db_user or not pwd_context.verify(user.password, db_user.password):
+    # Check the password is valid
+    verified, new_hash = await verify_password(user.email, user.password, row.password)
+    if not verified:
         raise HTTPException(status_code=400, detail="Invalid credentials")
 
-    return {
-        "id": db_user.id,
-        "email": db_user.email,
-        "full_name": db_user.full_name,
-        "occupation": db_user.occupation,
-        "company": db_user.company,
-        "skills": db_user.skills,
-        "country": db_user.country,
-        "city": db_user.city,
-        "linkedin_url": db_user.linkedin_url,
-        "verified": db_user.verified,  # Return boolean
-        "wallet_id": db_user.wallet_id,
-        "wallet_address": db_user.wallet_address
-    }
+    # Load the full profile only once the password is verified
+    db_user = await db.get(User, row.id)
+
+    # Store the argon2id re-hash of a legacy bcrypt password
+    if new_hash:
+        db_user.password = new_hash
+        await db.commit()
+
+    return db_user
+
+def extract_pdf_text_pdfminer(pdf_file) -> str:
+    """Extract text with pdfminer, skipping layout analysis (laparams=None)."""
+    pdf_file.seek(0)
+    output = io.StringIO()
+    extract_text_to_fp(pdf_file, output, laparams=None)
+    return output.getvalue()
+
+# Long PDFs are split into page chunks and parsed in separate processes, around the GIL
+PDF_PAGES_PER_CHUNK = 8
+PDF_PARALLEL_MIN_PAGES = 20
+# Per uvicorn worker, and there are already 2 * cpu + 1 of those; kept small so they don't multiply
+PDF_PROCESS_WORKERS = 2
+# Pool processes fork from a forkserver that has preloaded only pdf_pages, so they neither inherit
+# this process's threads, locks or PDFium state nor import the app
+PDF_MP_CONTEXT = multiprocessing.get_context("forkserver")
+PDF_MP_CONTEXT.set_forkserver_preload(["pdf_pages"])
+
+def new_pdf_pool():
+    return ProcessPoolExecutor(max_workers=PDF_PROCESS_WORKERS, mp_context=PDF_MP_CONTEXT)
+
+async def extract_pdf_pages_in_pool(contents: bytes, page_count: int) -> str:
+    loop = asyncio.get_running_loop()
+    for attempt in range(2):
+        pool = app.state.pdf_pool
+        try:
+            chunks = await asyncio.gather(*(
+                loop.run_in_executor(pool, extract_pdf_pages, contents, start,
+                                     min(start + PDF_PAGES_PER_CHUNK, page_count))
+                for start in range(0, page_count, PDF_PAGES_PER_CHUNK)
+            ))
+            return "\n".join(chunks)
+        except BrokenProcessPool:
+            # A parser process died (a PDFium crash on a malformed file, an OOM kill), which leaves
+            # the pool unusable. Replace it once per broken pool, then retry in the new one; a file
+            # that breaks that one too fails this request only.
+            if app.state.pdf_pool is pool:
+                logger.warning("PDF process pool broke, replacing it")
+                pool.shutdown(wait=False, cancel_futures=True)
+                app.state.pdf_pool = new_pdf_pool()
+            if attempt:
+                raise
+
+async def extract_pdf_text(pdf_file) -> str:
+    page_count = await run_in_threadpool(count_pdf_pages, pdf_file)
+
+    if page_count == 0:
+        # PDFium rejects some malformed files that pdfminer's parser still reads
+        return await run_in_threadpool(extract_pdf_text_pdfminer, pdf_file)
+
+    if page_count < PDF_PARALLEL_MIN_PAGES:
+        text = await run_in_threadpool(extract_pdf_pages, pdf_file, 0, page_count)
+    else:
+        # Worker processes need picklable input, so hand them the raw bytes
+        pdf_file.seek(0)
+        text = await extract_pdf_pages_in_pool(pdf_file.read(), page_count)
+
+    # PDFium finds no text in some unusually encoded files; give pdfminer a try on those
+    return text if text.strip() else await run_in_threadpool(extract_pdf_text_pdfminer, pdf_file)
+
+# Largest PDF accepted by /extract-text
+MAX_PDF_SIZE = 10 * 1024 * 1024
 
 # File upload and text extraction
 @app.post("/extract-text")
 async def extract_text_from_pdf(file: UploadFile = File(...)):
     if file.content_type == 'application/pdf':
-        contents = await file.read()
-        with open(f"{file.filename}", 'wb') as f:
-            f.write(contents)
+        # Starlette has already spooled the upload (in memory when small, on disk otherwise),
+        # so the parsers read that file directly instead of another copy of it
+        pdf_file = file.file
+        size = file.size if file.size is not None else pdf_file.seek(0, os.SEEK_END)
+        if size > MAX_PDF_SIZE:
+            raise HTTPException(status_code=413, detail="PDF is larger than 10 MB.")
+        pdf_file.seek(0)
+
         try:
-            text = extract_text(file.filename)
-            os.remove(file.filename)
+            text = await extract_pdf_text(pdf_file)
             return {"extracted_text": text}
         except Exception as e:
             return {"error": str(e)}
@@ -375,4 +686,13 @@ async def extract_text_from_pdf(file: UploadFile = File(...)):
 
 # Start the app
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # Create the schema once, before the workers start and race each other to it
+    async def create_schema():
+        await init_db()
+        await engine.dispose()
+
+    asyncio.run(create_schema())
+
+    # Workers need an import string; uvloop and httptools replace the pure-Python loop and parser
+    uvicorn.run("hrapi:app", host="0.0.0.0", port=8000, workers=2 * os.cpu_count() + 1,
+                loop="uvloop", http="httptools", log_level="warning", access_log=False)
@@ -1,10 +1,35 @@
-from sqlalchemy import Column, Integer, String, create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy import Column, Integer, String, Boolean, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import declarative_base
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
+# Database setup
 Base = declarative_base()
+DATABASE_URL = "sqlite+aiosqlite:///./test.db"
+engine = create_async_engine(
+    DATABASE_URL,
+    connect_args={"timeout": 30},
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=20,
+    max_overflow=40,
+    pool_pre_ping=True,
+)
+
+# WAL + synchronous=NORMAL: a commit no longer needs a full fsync of the main db file,
+# and readers don't block on writers. Page cache and temp tables stay in memory.
+@event.listens_for(engine.sync_engine, "connect")
+def set_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA cache_size=-20000")
+    cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.close()
+
+SessionLocal = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
 
-# User model
+# User table for registration
 class User(Base):
     __tablename__ = 'users'
     id = Column(Integer, primary_key=True, index=True)
@@ -17,6 +42,9 @@ class User(Base):
     country = Column(String)
     city = Column(String)
     linkedin_url = Column(String)
+    verified = Column(Boolean, default=False)  # Changed to Boolean
+    wallet_id = Column(String)
+    wallet_address = Column(String)
 
 # Verification model
 class Verification(Base):
@@ -25,10 +53,12 @@ class Verification(Base):
     email_hash = Column(String, unique=True, index=True)  # Store hashed email
     verified = Column(String, default="not")  # Can be 'not', 'device', or 'orb'
 
-# Database setup
-DATABASE_URL = "sqlite:///./test.db"
-engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# Create the tables in the database
-Base.metadata.create_all(bind=engine)
+# Create the tables in the database (called before the workers start, and from each worker's startup hook)
+async def init_db():
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    except OperationalError as e:
+        # Another worker created the table between the existence check and CREATE TABLE
+        if "already exists" not in str(e.orig):
+            raise
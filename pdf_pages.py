@@ -0,0 +1,42 @@
+import threading
+
+import pypdfium2 as pdfium
+
+# PDFium helpers, kept apart from hrapi so the PDF worker processes only import PDFium,
+# not the whole app
+
+# PDFium is not thread-safe: no two calls may overlap, even on different documents. Every
+# PDFium call in a process runs under this lock (worker processes each have their own).
+PDFIUM_LOCK = threading.Lock()
+
+def extract_pdf_pages(pdf_file, start: int, stop: int) -> str:
+    """Extract the text of pages [start, stop) of a PDF (bytes or binary file) with PDFium."""
+    with PDFIUM_LOCK:
+        pdf = pdfium.PdfDocument(pdf_file)
+        try:
+            texts = []
+            for index in range(start, stop):
+                page = pdf[index]
+                textpage = page.get_textpage()
+                texts.append(textpage.get_text_range())
+                # Close explicitly, so no PDFium finalizer runs later outside the lock
+                textpage.close()
+                page.close()
+            return "\n".join(texts)
+        finally:
+            pdf.close()
+
+def count_pdf_pages(pdf_file) -> int:
+    """Return the page count, or 0 when PDFium can't open the file."""
+    with PDFIUM_LOCK:
+        try:
+            pdf = pdfium.PdfDocument(pdf_file)
+        except pdfium.PdfiumError:
+            return 0
+        try:
+            return len(pdf)
+        finally:
+            pdf.close()
+
+def warm_up() -> None:
+    """No-op run in each pool process at startup, so it is spawned before the first upload."""
@@ -0,0 +1,52 @@
+import time
+
+import numpy as np
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIM = 1536
+
+
+class SemanticCache:
+    """In-memory nearest-neighbour cache of results keyed by L2-normalized embeddings.
+
+    Every entry belongs to a group (any hashable) and only matches lookups for the same group,
+    so the parts of a request that must match exactly never go through the similarity check.
+    Entries expire ttl seconds after they are added.
+    """
+
+    def __init__(self, maxsize=2048, threshold=0.95, dim=EMBEDDING_DIM, ttl=float("inf")):
+        self.threshold = threshold
+        self.ttl = ttl
+        self.vectors = np.zeros((maxsize, dim), dtype=np.float32)
+        self.groups = np.zeros(maxsize, dtype=np.int64)
+        self.expires = np.zeros(maxsize, dtype=np.float64)
+        self.results = [None] * maxsize
+        self.size = 0
+        self.next = 0  # Oldest slot, overwritten once the cache is full
+
+    @staticmethod
+    def normalize(embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / np.linalg.norm(vector)
+
+    def get(self, vector, group):
+        if self.size == 0:
+            return None
+
+        # Cosine similarity is a dot product on normalized vectors; entries from other groups
+        # and expired ones never match
+        similarities = self.vectors[:self.size] @ vector
+        live = (self.groups[:self.size] == hash(group)) & (self.expires[:self.size] > time.monotonic())
+        similarities[~live] = -np.inf
+        best = int(np.argmax(similarities))
+        if similarities[best] >= self.threshold:
+            return self.results[best]
+        return None
+
+    def add(self, vector, group, result):
+        self.vectors[self.next] = vector
+        self.groups[self.next] = hash(group)
+        self.expires[self.next] = time.monotonic() + self.ttl
+        self.results[self.next] = result
+        self.next = (self.next + 1) % len(self.results)
+        self.size = min(self.size + 1, len(self.results))